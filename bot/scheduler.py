@@ -1,23 +1,55 @@
 import asyncio
 import logging
 import os
-import ssl
-import time
 from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
 
-from telegram import Bot
+from sqlalchemy import Integer, and_, bindparam, cast, func, or_, select
+from sqlalchemy.orm import joinedload
+from telegram.error import NetworkError, RetryAfter, TimedOut
+from telegram.ext import AIORateLimiter, ExtBot
 from telegram.request import HTTPXRequest
 
 from config.settings import get_bot_token
-from database.models import Reminder, Schedule, User
+from database.models import Reminder, Schedule
 from database.operations import SessionLocal
 
-# configure SSL for macOS
-if os.name == "posix" and os.uname().sysname == "Darwin":
-    ssl._create_default_https_context = ssl._create_unverified_context
-
 logger = logging.getLogger(__name__)
 
+# cap on in-flight sends during a broadcast; the rate limiter handles msg/s,
+# this bounds memory and socket pressure from the gather fan-out
+MAX_CONCURRENT_SENDS = 16
+
+# due-schedule statement built once at import; only bind parameters vary per
+# tick so SQLAlchemy's compiled-statement cache always hits
+_DUE_BASE_STMT = (
+    select(Schedule)
+    .options(joinedload(Schedule.user))
+    .outerjoin(
+        Reminder,
+        and_(
+            Reminder.schedule_id == Schedule.id,
+            Reminder.reminder_date >= bindparam("today_start"),
+            Reminder.is_sent == True,
+        ),
+    )
+    .where(Schedule.is_active == True, Reminder.id.is_(None))
+)
+
+# SQLite-only fast path: skip schedules whose precomputed due date is in the
+# future, unless the cycle has ended and completion handling is needed
+_DUE_SQLITE_STMT = _DUE_BASE_STMT.where(
+    or_(
+        cast(
+            func.julianday(bindparam("today_iso")) - func.julianday(func.date(Schedule.start_date)),
+            Integer,
+        )
+        >= Schedule.cycle_duration_days,
+        Schedule.next_reminder_date.is_(None),
+        Schedule.next_reminder_date <= bindparam("today"),
+    )
+)
+
 
 class ReminderScheduler:
     """handles daily reminder notifications"""
@@ -25,20 +57,30 @@ class ReminderScheduler:
     def __init__(self, test_mode=False):
         # defer bot creation until first use for lazy validation
         self._bot = None
+        # shared keep-alive pool sized for concurrent broadcast sends
         self._request = HTTPXRequest(
-            connection_pool_size=20,  # larger pool
-            read_timeout=30,
-            write_timeout=30,
-            connect_timeout=30,
+            connection_pool_size=64,
+            read_timeout=20,
+            write_timeout=20,
+            connect_timeout=5,
             pool_timeout=30,
         )
         self.test_mode = test_mode
 
+    def attach_bot(self, bot):
+        """reuse an existing bot (and its HTTP client) instead of building one"""
+        self._bot = bot
+
     @property
     def bot(self):
         """lazy initialization of bot instance"""
         if self._bot is None:
-            self._bot = Bot(token=get_bot_token(), request=self._request)
+            # rate limiter keeps concurrent sends under Telegram's 30 msg/s cap
+            self._bot = ExtBot(
+                token=get_bot_token(),
+                request=self._request,
+                rate_limiter=AIORateLimiter(overall_max_rate=25, overall_time_period=1),
+            )
         return self._bot
 
     def should_send_reminder_today(self, schedule_obj, today):
@@ -52,7 +94,11 @@ class ReminderScheduler:
         if days_since_start >= schedule_obj.cycle_duration_days:
             return False
 
-        # check if today's weekday matches schedule (ISO: Monday=1, Sunday=7)
+        # precomputed bitmask check: bit i = ISO day i+1 active (Monday = bit 0)
+        if schedule_obj.days_of_week_mask:
+            return bool(schedule_obj.days_of_week_mask & (1 << today.weekday()))
+
+        # fallback for rows without a mask: parse the days string
         today_weekday = str(today.isoweekday())
         if schedule_obj.days_of_week:
             return today_weekday in schedule_obj.days_of_week.split(",")
@@ -60,15 +106,29 @@ class ReminderScheduler:
         # fallback for legacy schedules without days_of_week
         return True
 
-    def check_and_complete_schedule(self, db, schedule_obj, today):
-        """check if schedule should be completed and mark it inactive"""
+    @staticmethod
+    def compute_next_reminder_date(schedule_obj, today):
+        """next date strictly after today whose weekday bit is set in the mask"""
+        mask = schedule_obj.days_of_week_mask
+        if not mask:
+            return None
+        for offset in range(1, 8):
+            candidate = today + timedelta(days=offset)
+            if mask & (1 << candidate.weekday()):
+                return candidate
+        return None
+
+    def check_and_complete_schedule(self, schedule_obj, today, now=None):
+        """check if schedule should be completed and mark it inactive
+
+        the change is persisted by the caller's per-tick transaction.
+        """
         days_since_start = (today - schedule_obj.start_date.date()).days
 
         # if cycle complete and not already marked
         if days_since_start >= schedule_obj.cycle_duration_days and schedule_obj.is_active:
             schedule_obj.is_active = False
-            schedule_obj.completed_at = datetime.utcnow()
-            db.commit()
+            schedule_obj.completed_at = now or datetime.utcnow()
             logger.info(f"marked schedule {schedule_obj.id} as completed")
             return True
         return False
@@ -77,8 +137,13 @@ class ReminderScheduler:
         """send reminder message to user"""
         try:
             await self.bot.send_message(chat_id=user_telegram_id, text=message, parse_mode="HTML")
-            logger.info(f"sent reminder to user {user_telegram_id}")
+            logger.debug("sent reminder to user %s", user_telegram_id)
             return True
+        except (RetryAfter, TimedOut, NetworkError) as e:
+            # expected during broadcasts (rate limits, flaky network): a
+            # warning without traceback formatting keeps the fan-out cheap
+            logger.warning("send failed tid=%s err=%s", user_telegram_id, e)
+            return False
         except Exception as e:
             logger.exception(f"failed to send reminder to {user_telegram_id}: {e}")
             return False
@@ -88,44 +153,50 @@ class ReminderScheduler:
         if self.test_mode:
             logger.info("processing TEST reminders (every minute)...")
 
-            # SIMPLE TEST MODE: send to all active schedules every time
-            db = SessionLocal()
+            # SIMPLE TEST MODE: send to all active schedules every time;
+            # collect messages first so no session is open while awaiting
             try:
-                # get all active schedules
-                active_schedules = db.query(Schedule).filter(Schedule.is_active == True).all()
+                pending = []
+                with SessionLocal() as db:
+                    # get all active schedules with users eager-loaded in one query
+                    active_schedules = (
+                        db.query(Schedule)
+                        .options(joinedload(Schedule.user))
+                        .filter(Schedule.is_active == True)
+                        .all()
+                    )
 
-                logger.info(f"found {len(active_schedules)} active schedules")
+                    logger.info(f"found {len(active_schedules)} active schedules")
+
+                    for schedule_obj in active_schedules:
+                        # user already loaded via joinedload
+                        user = schedule_obj.user
+                        if not user:
+                            logger.warning(f"user not found for schedule {schedule_obj.id}")
+                            continue
+
+                        # create simple test message
+                        test_message = (
+                            f"🧪 TEST REMINDER #{datetime.utcnow().minute}\n\n"
+                            f"💊 Peptide: <b>{schedule_obj.peptide_name}</b>\n"
+                            f"📏 Dosage: <b>{schedule_obj.dosage}</b>\n"
+                            f"⏰ Frequency: <b>{schedule_obj.frequency}</b>\n\n"
+                            f"This is a test reminder sent every minute! 🔔"
+                        )
+                        pending.append((user.telegram_id, test_message))
 
-                if not active_schedules:
+                if not pending:
                     logger.info("no active schedules found")
                     return
 
-                for schedule_obj in active_schedules:
-                    # get user info
-                    user = db.query(User).filter(User.id == schedule_obj.user_id).first()
-                    if not user:
-                        logger.warning(f"user not found for schedule {schedule_obj.id}")
-                        continue
-
-                    # create simple test message
-                    test_message = (
-                        f"🧪 TEST REMINDER #{datetime.utcnow().minute}\n\n"
-                        f"💊 Peptide: <b>{schedule_obj.peptide_name}</b>\n"
-                        f"📏 Dosage: <b>{schedule_obj.dosage}</b>\n"
-                        f"⏰ Frequency: <b>{schedule_obj.frequency}</b>\n\n"
-                        f"This is a test reminder sent every minute! 🔔"
-                    )
-
-                    # send reminder
-                    logger.info(f"sending test reminder to user {user.telegram_id}")
-                    success = await self.send_reminder(user.telegram_id, test_message)
+                for telegram_id, test_message in pending:
+                    logger.info(f"sending test reminder to user {telegram_id}")
+                    success = await self.send_reminder(telegram_id, test_message)
 
                     if success:
-                        logger.info(
-                            f"✅ test reminder sent successfully to user {user.telegram_id}"
-                        )
+                        logger.info(f"✅ test reminder sent successfully to user {telegram_id}")
                     else:
-                        logger.error(f"❌ failed to send test reminder to user {user.telegram_id}")
+                        logger.error(f"❌ failed to send test reminder to user {telegram_id}")
 
                 logger.info("TEST reminders processing complete")
                 return
@@ -133,136 +204,187 @@ class ReminderScheduler:
             except Exception as e:
                 logger.exception(f"error in test mode: {e}")
                 return
-            finally:
-                db.close()
 
         # NORMAL MODE (original logic)
         logger.info("processing daily reminders...")
-        today = datetime.utcnow().date()
+        # compute today's boundaries once for the whole pass
+        now = datetime.utcnow()
+        today = now.date()
+        today_start = datetime.combine(today, datetime.min.time())
 
-        db = SessionLocal()
         try:
-            # get all active schedules
-            active_schedules = db.query(Schedule).filter(Schedule.is_active == True).all()
+            # DB work and Telegram I/O never overlap: completion updates and
+            # due-date advances commit in one transaction, the broadcast then
+            # runs with no session open, and the reminder rows land in a
+            # fresh transaction afterwards
+            with SessionLocal() as db, db.begin():
+                pending = self._collect_due_schedules(db, now, today, today_start)
+            if pending:
+                await self._send_pending(pending, now)
+            logger.info("daily reminders processing complete")
+        except Exception as e:
+            logger.exception(f"error processing reminders: {e}")
 
-            if not active_schedules:
-                logger.info("no active schedules found")
-                return
+    def _collect_due_schedules(self, db, now, today, today_start):
+        """query due schedules, apply state changes and queue notifications"""
+        # single precompiled query: active schedules with their user
+        # eager-loaded, left-joined against today's sent reminders so
+        # already-notified schedules drop out; the SQLite variant also
+        # filters by the precomputed due date (Python checks below stay
+        # authoritative on other backends)
+        if db.get_bind().dialect.name == "sqlite":
+            stmt = _DUE_SQLITE_STMT
+            params = {
+                "today_start": today_start,
+                "today": today,
+                "today_iso": today.isoformat(),
+            }
+        else:
+            stmt = _DUE_BASE_STMT
+            params = {"today_start": today_start}
+
+        # (telegram_id, message, schedule_id or None for completions)
+        pending = []
+        processed = 0
+
+        # stream rows in chunks so memory stays flat as the user base grows
+        # (joinedload on the many-to-one user relationship is yield_per-safe)
+        rows = db.scalars(stmt.execution_options(yield_per=500), params)
+        for schedule_obj in rows:
+            processed += 1
+            logger.debug(
+                "processing schedule: %s (id=%s, days_of_week=%s)",
+                schedule_obj.peptide_name,
+                schedule_obj.id,
+                schedule_obj.days_of_week,
+            )
 
-            for schedule_obj in active_schedules:
-                logger.info(
-                    f"processing schedule: {schedule_obj.peptide_name} (id={schedule_obj.id}, days_of_week={schedule_obj.days_of_week})"
+            # user already loaded via joinedload - no extra query
+            user = schedule_obj.user
+            if not user:
+                logger.warning(f"skipping {schedule_obj.peptide_name}: user not found")
+                continue
+
+            # check if schedule should be completed
+            if self.check_and_complete_schedule(schedule_obj, today, now):
+                # queue completion notification (no reminder record needed)
+                rest_end_date = today + timedelta(days=schedule_obj.rest_period_days)
+                completion_message = (
+                    f"🎉 <b>Cycle Complete!</b>\n\n"
+                    f"💊 Peptide: <b>{schedule_obj.peptide_name}</b>\n"
+                    f"✅ You've completed your {schedule_obj.cycle_duration_days}-day cycle!\n\n"
+                    f"😴 <b>Rest Period:</b> {schedule_obj.rest_period_days} days\n"
+                    f"📅 <b>Can restart:</b> {rest_end_date.strftime('%B %d, %Y')}\n\n"
+                    f"Great work on completing your cycle! 🧬"
                 )
+                pending.append((user.telegram_id, completion_message, None))
+                continue
+
+            # check if reminder needed today
+            should_remind = self.should_send_reminder_today(schedule_obj, today)
+            logger.debug(
+                "%s: weekday=%s, should_remind=%s",
+                schedule_obj.peptide_name,
+                today.isoweekday(),
+                should_remind,
+            )
 
-                # get user info first (needed for both reminders and completions)
-                user = db.query(User).filter(User.id == schedule_obj.user_id).first()
-                if not user:
-                    logger.warning(f"skipping {schedule_obj.peptide_name}: user not found")
-                    continue
-
-                # check if schedule should be completed
-                if self.check_and_complete_schedule(db, schedule_obj, today):
-                    # send completion notification
-                    rest_end_date = today + timedelta(days=schedule_obj.rest_period_days)
-                    completion_message = (
-                        f"🎉 <b>Cycle Complete!</b>\n\n"
-                        f"💊 Peptide: <b>{schedule_obj.peptide_name}</b>\n"
-                        f"✅ You've completed your {schedule_obj.cycle_duration_days}-day cycle!\n\n"
-                        f"😴 <b>Rest Period:</b> {schedule_obj.rest_period_days} days\n"
-                        f"📅 <b>Can restart:</b> {rest_end_date.strftime('%B %d, %Y')}\n\n"
-                        f"Great work on completing your cycle! 🧬"
-                    )
-                    await self.send_reminder(user.telegram_id, completion_message)
-                    continue
-
-                # check if reminder needed today
-                today_weekday = today.isoweekday()
-                should_remind = self.should_send_reminder_today(schedule_obj, today)
-                logger.info(
-                    f"{schedule_obj.peptide_name}: weekday={today_weekday}, should_remind={should_remind}"
-                )
+            # advance the precomputed due date past today either way so the
+            # SQL fast path skips this schedule until it is next due
+            schedule_obj.next_reminder_date = self.compute_next_reminder_date(schedule_obj, today)
 
-                if not should_remind:
-                    logger.info(f"skipping {schedule_obj.peptide_name}: not scheduled for today")
-                    continue
-
-                # check if reminder already sent today
-                existing_reminder = (
-                    db.query(Reminder)
-                    .filter(
-                        Reminder.schedule_id == schedule_obj.id,
-                        Reminder.reminder_date >= datetime.combine(today, datetime.min.time()),
-                        Reminder.is_sent == True,
-                    )
-                    .first()
-                )
+            if not should_remind:
+                logger.debug("skipping %s: not scheduled for today", schedule_obj.peptide_name)
+                continue
 
-                if existing_reminder:
-                    logger.info(
-                        f"skipping {schedule_obj.peptide_name}: already sent at {existing_reminder.reminder_date}"
-                    )
-                    continue
+            # create reminder message
+            days_remaining = (
+                schedule_obj.cycle_duration_days - (today - schedule_obj.start_date.date()).days
+            )
 
-                # create reminder message
-                days_remaining = (
-                    schedule_obj.cycle_duration_days - (today - schedule_obj.start_date.date()).days
-                )
+            message = (
+                f"🌅 <b>Good morning!</b>\n\n"
+                f"💊 Today you need to take: <b>{schedule_obj.peptide_name}</b>\n"
+                f"📏 Dosage: <b>{schedule_obj.dosage}</b>\n"
+                f"📅 Days remaining in cycle: <b>{days_remaining}</b>\n\n"
+                f"Have a great day! 🧬"
+            )
 
-                message = (
-                    f"🌅 <b>Good morning!</b>\n\n"
-                    f"💊 Today you need to take: <b>{schedule_obj.peptide_name}</b>\n"
-                    f"📏 Dosage: <b>{schedule_obj.dosage}</b>\n"
-                    f"📅 Days remaining in cycle: <b>{days_remaining}</b>\n\n"
-                    f"Have a great day! 🧬"
-                )
+            pending.append((user.telegram_id, message, schedule_obj.id))
 
-                # send reminder
-                success = await self.send_reminder(user.telegram_id, message)
+        if not processed:
+            logger.info("no active schedules need reminders")
+            return pending
 
-                # create reminder record
-                reminder = Reminder(
-                    schedule_id=schedule_obj.id, reminder_date=datetime.utcnow(), is_sent=success
-                )
-                if success:
-                    reminder.sent_at = datetime.utcnow()
+        logger.info("processed %d due schedules, %d notifications queued", processed, len(pending))
+        return pending
 
-                db.add(reminder)
+    async def _send_pending(self, pending, now):
+        """fan out queued notifications and record reminder rows"""
+        # fan out all sends concurrently; the bot's rate limiter throttles
+        # msg/s and the semaphore bounds how many are in flight at once
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_SENDS)
 
-            db.commit()
-            logger.info("daily reminders processing complete")
+        async def _send(telegram_id, message):
+            async with semaphore:
+                return await self.send_reminder(telegram_id, message)
 
-        except Exception as e:
-            logger.exception(f"error processing reminders: {e}")
-            db.rollback()
-        finally:
-            db.close()
+        results = await asyncio.gather(
+            *[_send(tid, msg) for tid, msg, _ in pending],
+            return_exceptions=True,
+        )
+
+        new_reminders = []
+        for (_, _, schedule_id), result in zip(pending, results, strict=True):
+            if schedule_id is None:
+                continue
+            success = result is True
+            new_reminders.append(
+                {
+                    "schedule_id": schedule_id,
+                    "reminder_date": now,
+                    "is_sent": success,
+                    "sent_at": now if success else None,
+                    "created_at": now,
+                }
+            )
 
+        if new_reminders:
+            # single multi-row INSERT instead of one statement per reminder
+            with SessionLocal() as db, db.begin():
+                db.execute(Reminder.__table__.insert(), new_reminders)
 
-# create scheduler instance with production mode (not test mode)
-reminder_scheduler = ReminderScheduler(test_mode=False)
 
+# single scheduler instance; REMINDER_MODE=test switches to the
+# every-run test broadcast instead of shipping a separate entry point
+reminder_scheduler = ReminderScheduler(test_mode=os.getenv("REMINDER_MODE", "prod") == "test")
 
-def run_daily_reminders():
-    """sync wrapper for daily reminders"""
-    asyncio.run(reminder_scheduler.process_daily_reminders())
+
+# timezone for the daily 8 AM wakeup; aware arithmetic stays correct across DST
+REMINDER_TZ = ZoneInfo(os.getenv("REMINDER_TZ", "UTC"))
 
 
 def calculate_seconds_until_next_8am():
     """calculate seconds to sleep until next 8:00 AM"""
-    now = datetime.now()
+    now = datetime.now(REMINDER_TZ)
     next_8am = now.replace(hour=8, minute=0, second=0, microsecond=0)
 
     # if past 8 AM today, schedule for tomorrow
-    if now.hour >= 8:
+    if next_8am <= now:
         next_8am += timedelta(days=1)
 
     sleep_seconds = (next_8am - now).total_seconds()
     return sleep_seconds, next_8am
 
 
-def start_reminder_worker():
-    """optimized reminder worker - sleeps until needed"""
-    logger.info("starting optimized reminder scheduler...")
+async def _reminder_worker_loop():
+    """async reminder loop - one sleep per day on a single event loop"""
+    # initialize once so the HTTPX client (and its keep-alive pool) persists
+    # across daily runs instead of being rebuilt per tick
+    try:
+        await reminder_scheduler.bot.initialize()
+    except Exception as e:
+        logger.exception(f"failed to initialize bot: {e}")
 
     while True:
         try:
@@ -272,16 +394,23 @@ def start_reminder_worker():
             logger.info(
                 f"sleeping {sleep_seconds / 3600:.1f} hours until next reminder: {next_8am}"
             )
-            time.sleep(sleep_seconds)
+            await asyncio.sleep(sleep_seconds)
 
             # execute daily reminders
             logger.info("waking up to send daily reminders...")
-            run_daily_reminders()
+            await reminder_scheduler.process_daily_reminders()
 
-            # small buffer to avoid immediate re-execution
-            time.sleep(60)
+            # no post-run buffer needed: once past 8 AM the next computed
+            # target is already tomorrow
 
         except Exception as e:
             logger.exception(f"error in reminder worker: {e}")
-            # fallback: sleep 1 hour on error
-            time.sleep(3600)
+            # sleep through to the next deadline; floor guards a tight loop
+            backoff, _ = calculate_seconds_until_next_8am()
+            await asyncio.sleep(max(60, backoff))
+
+
+def start_reminder_worker():
+    """optimized reminder worker - single event loop, sleeps until needed"""
+    logger.info("starting optimized reminder scheduler...")
+    asyncio.run(_reminder_worker_loop())
@@ -1,12 +1,12 @@
 import logging
 import os
-import ssl
 
+import certifi
 from dotenv import load_dotenv
 
-# configure SSL for macOS before any other imports
-if os.name == "posix" and os.uname().sysname == "Darwin":
-    ssl._create_default_https_context = ssl._create_unverified_context
+# point stdlib TLS at certifi's CA bundle (macOS system Python ships without
+# OpenSSL certs) instead of disabling verification; httpx already uses certifi
+os.environ.setdefault("SSL_CERT_FILE", certifi.where())
 
 # load environment variables from .env file
 load_dotenv()
@@ -29,5 +29,10 @@ DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///peptide_bot.db")
 logging.basicConfig(
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging.INFO
 )
+# the format string uses neither thread nor process fields, so skip the
+# per-record reflective lookups
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
 
 logger = logging.getLogger(__name__)
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import Boolean, Column, Date, DateTime, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import declarative_base, relationship
 
 Base = declarative_base()
@@ -12,7 +12,7 @@ class User(Base):
     __tablename__ = "users"
 
     id = Column(Integer, primary_key=True)
-    telegram_id = Column(Integer, unique=True, nullable=False)
+    telegram_id = Column(Integer, unique=True, index=True, nullable=False)
     username = Column(String(100))
     first_name = Column(String(100))
     last_name = Column(String(100))
@@ -26,15 +26,17 @@ class Schedule(Base):
     """peptide schedule model"""
 
     __tablename__ = "schedules"
+    __table_args__ = (Index("ix_sched_active_user", "is_active", "user_id"),)
 
     id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
 
     # peptide info
     peptide_name = Column(String(100), nullable=False)
     dosage = Column(String(50), nullable=False)
     frequency = Column(String(100), nullable=True)  # legacy field
     days_of_week = Column(String(20), nullable=True)  # "1,2,3,4,5,6,7" or "1,3,5" etc.
+    days_of_week_mask = Column(Integer, nullable=True)  # bit i set = ISO day i+1 active
 
     # cycle info
     cycle_duration_days = Column(Integer, nullable=False)
@@ -42,6 +44,7 @@ class Schedule(Base):
 
     # tracking
     start_date = Column(DateTime, nullable=False)
+    next_reminder_date = Column(Date, index=True, nullable=True)  # next day a send is due
     is_active = Column(Boolean, default=True)
     completed_at = Column(DateTime, nullable=True)
     notes = Column(Text)
@@ -57,6 +60,7 @@ class Reminder(Base):
     """daily reminder tracking"""
 
     __tablename__ = "reminders"
+    __table_args__ = (Index("ix_rem_sched_date_sent", "schedule_id", "reminder_date", "is_sent"),)
 
     id = Column(Integer, primary_key=True)
     schedule_id = Column(Integer, ForeignKey("schedules.id"), nullable=False)
@@ -1,19 +1,83 @@
 import logging
-from datetime import datetime
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from functools import lru_cache
 
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import joinedload, sessionmaker
 
 from config.settings import DATABASE_URL
 from database.models import Base, Schedule, User
 
 logger = logging.getLogger(__name__)
 
-# create database engine
-engine = create_engine(DATABASE_URL, echo=False)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# create database engine with a persistent connection pool so each call
+# reuses a warm connection instead of reconnecting (matters on Postgres)
+engine = create_engine(
+    DATABASE_URL,
+    echo=False,
+    pool_size=10,
+    max_overflow=20,
+    pool_pre_ping=True,
+    pool_recycle=1800,
+    connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {},
+)
+if DATABASE_URL.startswith("sqlite"):
 
+    @event.listens_for(engine, "connect")
+    def _sqlite_pragmas(dbapi_conn, _connection_record):
+        """enable WAL + relaxed fsync so readers don't block behind the writer"""
+        cur = dbapi_conn.cursor()
+        cur.execute("PRAGMA journal_mode=WAL")
+        cur.execute("PRAGMA synchronous=NORMAL")
+        cur.execute("PRAGMA temp_store=MEMORY")
+        cur.execute("PRAGMA mmap_size=268435456")
+        cur.execute("PRAGMA cache_size=-20000")
+        cur.close()
 
+
+# plain factory: every SessionLocal() call is a fresh Session, so concurrent
+# coroutines on the bot's event loop never share (or close) each other's
+# session the way a thread-scoped registry would. expire_on_commit=False keeps
+# returned objects usable after the session closes, matching how callers
+# already use them
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+
+@contextmanager
+def session_scope():
+    """provide a transactional session scope around a series of operations"""
+    db = SessionLocal()
+    try:
+        yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+@lru_cache(maxsize=256)
+def _days_to_mask(days_of_week: str) -> int:
+    """convert "1,3,5" style days string to a 7-bit mask (bit 0 = Monday)"""
+    return sum(1 << (int(d) - 1) for d in days_of_week.split(","))
+
+
+def _first_due_date(mask: int, from_date):
+    """first date on/after from_date whose weekday bit is set in mask"""
+    if not mask:
+        return None
+    for offset in range(7):
+        candidate = from_date + timedelta(days=offset)
+        if mask & (1 << candidate.weekday()):
+            return candidate
+    return None
+
+
+@lru_cache(maxsize=256)
 def _frequency_to_days(frequency: str) -> str:
     """convert legacy frequency string to days_of_week format"""
     freq = frequency.lower().strip()
@@ -46,28 +110,80 @@ def _migrate_legacy_schedules():
                 f"migrated schedule {schedule.id}: {schedule.frequency} -> {schedule.days_of_week}"
             )
 
-        if schedules:
+        # backfill bitmask for rows created before days_of_week_mask existed
+        unmasked = (
+            db.query(Schedule)
+            .filter(Schedule.days_of_week_mask.is_(None), Schedule.days_of_week.isnot(None))
+            .all()
+        )
+        for schedule in unmasked:
+            schedule.days_of_week_mask = _days_to_mask(schedule.days_of_week)
+
+        # backfill next_reminder_date so the due-date fast path covers old rows
+        undated = (
+            db.query(Schedule)
+            .filter(
+                Schedule.next_reminder_date.is_(None),
+                Schedule.days_of_week_mask.isnot(None),
+                Schedule.is_active == True,
+            )
+            .all()
+        )
+        today = datetime.utcnow().date()
+        for schedule in undated:
+            schedule.next_reminder_date = _first_due_date(schedule.days_of_week_mask, today)
+
+        if schedules or unmasked or undated:
             db.commit()
-            logger.info(f"migrated {len(schedules)} legacy schedules")
+            logger.info(
+                f"migrated {len(schedules)} legacy schedules, "
+                f"{len(unmasked)} masks, {len(undated)} due dates"
+            )
     finally:
         db.close()
 
 
 def _add_column_if_missing():
-    """add days_of_week column if it doesn't exist (SQLite migration)"""
+    """add newer schedule columns if they don't exist (SQLite migration)"""
+    columns = (
+        ("days_of_week", "ALTER TABLE schedules ADD COLUMN days_of_week VARCHAR(20)"),
+        ("days_of_week_mask", "ALTER TABLE schedules ADD COLUMN days_of_week_mask INTEGER"),
+        ("next_reminder_date", "ALTER TABLE schedules ADD COLUMN next_reminder_date DATE"),
+    )
     with engine.connect() as conn:
-        try:
-            conn.execute(text("SELECT days_of_week FROM schedules LIMIT 1"))
-        except Exception:
-            conn.execute(text("ALTER TABLE schedules ADD COLUMN days_of_week VARCHAR(20)"))
-            conn.commit()
-            logger.info("added days_of_week column to schedules table")
+        for column, ddl in columns:
+            try:
+                conn.execute(text(f"SELECT {column} FROM schedules LIMIT 1"))
+            except Exception:
+                conn.execute(text(ddl))
+                conn.commit()
+                logger.info(f"added {column} column to schedules table")
+
+
+def _create_indexes_if_missing():
+    """create hot-path indexes on existing DBs (create_all only covers fresh ones)"""
+    with engine.connect() as conn:
+        conn.execute(
+            text(
+                "CREATE INDEX IF NOT EXISTS ix_rem_sched_date_sent "
+                "ON reminders (schedule_id, reminder_date, is_sent)"
+            )
+        )
+        conn.execute(
+            text(
+                "CREATE INDEX IF NOT EXISTS ix_sched_active_user ON schedules (is_active, user_id)"
+            )
+        )
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_users_telegram_id ON users (telegram_id)"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_schedules_user_id ON schedules (user_id)"))
+        conn.commit()
 
 
 def init_database():
     """create all database tables and run migrations"""
     Base.metadata.create_all(bind=engine)
     _add_column_if_missing()
+    _create_indexes_if_missing()
     _migrate_legacy_schedules()
     logger.info("database initialized")
 
@@ -85,8 +201,7 @@ def get_or_create_user(
     telegram_id: int, username: str = None, first_name: str = None, last_name: str = None
 ):
     """get existing user or create new one"""
-    db = SessionLocal()
-    try:
+    with session_scope() as db:
         user = db.query(User).filter(User.telegram_id == telegram_id).first()
         if not user:
             user = User(
@@ -96,12 +211,9 @@ def get_or_create_user(
                 last_name=last_name,
             )
             db.add(user)
-            db.commit()
-            db.refresh(user)
+            db.flush()
             logger.info(f"created new user: {telegram_id}")
         return user
-    finally:
-        db.close()
 
 
 def create_schedule(
@@ -114,38 +226,66 @@ def create_schedule(
     notes: str | None = None,
 ):
     """create a new peptide schedule"""
-    db = SessionLocal()
-    try:
+    start_date = datetime.utcnow()
+    mask = _days_to_mask(days_of_week)
+    with session_scope() as db:
         schedule = Schedule(
             user_id=user_id,
             peptide_name=peptide_name,
             dosage=dosage,
             days_of_week=days_of_week,
+            days_of_week_mask=mask,
             cycle_duration_days=cycle_duration_weeks * 7,
             rest_period_days=rest_period_days,
-            start_date=datetime.utcnow(),
+            start_date=start_date,
+            next_reminder_date=_first_due_date(mask, start_date.date()),
             notes=notes,
         )
         db.add(schedule)
-        db.commit()
-        db.refresh(schedule)
+        db.flush()
+        telegram_id = db.query(User.telegram_id).filter(User.id == user_id).scalar()
         logger.info(f"created schedule for user {user_id}: {peptide_name}")
-        return schedule
-    finally:
-        db.close()
+
+    if telegram_id is not None:
+        invalidate_schedule_cache(telegram_id)
+    return schedule
+
+
+# short-lived cache of active schedules per telegram_id; entries are detached
+# ORM objects (expire_on_commit=False) so they stay readable outside a session
+_SCHEDULE_CACHE_TTL = 30.0
+_SCHEDULE_CACHE_MAX = 4096
+_schedule_cache: dict[int, tuple[float, list]] = {}
+_schedule_cache_lock = threading.Lock()
+
+
+def invalidate_schedule_cache(telegram_id: int):
+    """drop the cached schedule list after any schedule mutation"""
+    with _schedule_cache_lock:
+        _schedule_cache.pop(telegram_id, None)
 
 
 def get_active_schedules(telegram_id: int):
     """get all active schedules for a user"""
-    db = SessionLocal()
-    try:
-        user = db.query(User).filter(User.telegram_id == telegram_id).first()
-        if not user:
-            return []
+    now = time.monotonic()
+    with _schedule_cache_lock:
+        cached = _schedule_cache.get(telegram_id)
+        if cached and cached[0] > now:
+            return cached[1]
 
+    with session_scope() as db:
+        # single JOIN instead of a user SELECT followed by a schedule SELECT;
+        # eager-load user so cached detached objects can't trigger lazy loads
         schedules = (
-            db.query(Schedule).filter(Schedule.user_id == user.id, Schedule.is_active == True).all()
+            db.query(Schedule)
+            .join(User, User.id == Schedule.user_id)
+            .options(joinedload(Schedule.user))
+            .filter(User.telegram_id == telegram_id, Schedule.is_active == True)
+            .all()
         )
-        return schedules
-    finally:
-        db.close()
+
+    with _schedule_cache_lock:
+        if len(_schedule_cache) >= _SCHEDULE_CACHE_MAX:
+            _schedule_cache.clear()
+        _schedule_cache[telegram_id] = (now + _SCHEDULE_CACHE_TTL, schedules)
+    return schedules
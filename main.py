@@ -2,181 +2,209 @@
 
 import asyncio
 import os
-import ssl
-import threading
-from datetime import datetime, timedelta
+import time
+from datetime import date, datetime
 
+from sqlalchemy import update as sql_update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import Application, CallbackQueryHandler, CommandHandler, MessageHandler, filters
+from telegram.ext import (
+    AIORateLimiter,
+    Application,
+    CallbackQueryHandler,
+    CommandHandler,
+    MessageHandler,
+    filters,
+)
+from telegram.request import HTTPXRequest
 
 from bot.scheduler import calculate_seconds_until_next_8am, reminder_scheduler
 from config.settings import get_bot_token, logger
 from database.models import Schedule, User, WorkerState
 from database.operations import (
-    SessionLocal,
     create_schedule,
+    engine,
     get_active_schedules,
     get_or_create_user,
     init_database,
+    invalidate_schedule_cache,
+    session_scope,
 )
 from parser.schedule_parser import days_to_readable, parse_schedule
 
-# configure SSL for macOS
-if os.name == "posix" and os.uname().sysname == "Darwin":
-    ssl._create_default_https_context = ssl._create_unverified_context
 
+def update_last_run_time(now=None):
+    """update the last successful reminder run time with a single upsert
 
-def update_last_run_time():
-    """update the last successful reminder run time"""
-    logger.info("starting update_last_run_time")
-    db = SessionLocal()
-    try:
-        logger.info("querying for existing worker state")
-        state = (
-            db.query(WorkerState).filter(WorkerState.worker_name == "reminder_scheduler").first()
-        )
-        if not state:
-            logger.info("creating new worker state record")
-            state = WorkerState(worker_name="reminder_scheduler")
-            db.add(state)
-        else:
-            logger.info("updating existing worker state record")
+    callers that already hold a timestamp can pass it to avoid another
+    clock read; defaults to utcnow.
+    """
+    now = now or datetime.utcnow()
+    insert_fn = sqlite_insert if engine.dialect.name == "sqlite" else pg_insert
+    stmt = insert_fn(WorkerState).values(worker_name="reminder_scheduler", last_run_time=now)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["worker_name"],
+        set_={"last_run_time": stmt.excluded.last_run_time, "updated_at": now},
+    )
 
-        state.last_run_time = datetime.utcnow()
-        logger.info("committing worker state to database")
-        db.commit()
-        logger.info("successfully updated last run time")
+    try:
+        with session_scope() as db:
+            db.execute(stmt)
+        logger.debug("updated last run time to %s", now)
     except Exception as e:
         logger.exception(f"failed to update last run time: {e}")
-        db.rollback()
-        raise  # re-raise to see if this is causing the issue
-    finally:
-        logger.info("closing database connection")
-        db.close()
+        raise
 
 
 async def run_reminder_with_retry(max_retries=3):
     """run reminder with retry logic"""
-    logger.info(f"starting run_reminder_with_retry with max_retries={max_retries}")
+    started = time.monotonic()
 
     for attempt in range(max_retries):
         try:
-            logger.info(f"reminder attempt {attempt + 1}/{max_retries}")
+            logger.debug("reminder attempt %d/%d", attempt + 1, max_retries)
             await reminder_scheduler.process_daily_reminders()
-            logger.info(f"reminder attempt {attempt + 1} succeeded")
-            update_last_run_time()
-            logger.info("successfully updated last run time")
+            # sync DB write runs in a thread so the bot's loop never blocks
+            await asyncio.to_thread(update_last_run_time)
+            # single INFO summary per tick; per-step chatter is DEBUG only
+            logger.info("reminder tick completed in %.2fs", time.monotonic() - started)
             return True
         except Exception as e:
             logger.exception(f"reminder attempt {attempt + 1} failed: {e}")
             if attempt < max_retries - 1:
                 sleep_time = 60 * (attempt + 1)
-                logger.info(f"sleeping {sleep_time} seconds before retry...")
+                logger.info("sleeping %d seconds before retry...", sleep_time)
                 await asyncio.sleep(sleep_time)  # exponential backoff
             else:
                 logger.error(f"all {max_retries} attempts failed")
     return False
 
 
-def reminder_worker():
-    """reminder worker function that runs in background thread with persistent event loop"""
-    logger.info("starting optimized reminder worker - 8 AM daily scheduling...")
-
-    # create a persistent event loop for this thread
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
+async def _reminder_loop(application):
+    """background reminder loop scheduled on the bot's own event loop"""
+    # run first reminder immediately
+    logger.info("running initial reminder check...")
+    try:
+        await run_reminder_with_retry()
+        logger.info("initial reminder check completed successfully")
+    except Exception as e:
+        logger.exception(f"initial reminder check failed: {e}")
 
-    async def async_worker():
-        """async worker that runs in persistent event loop"""
-        # run first reminder immediately
-        logger.info("running initial reminder check...")
+    iteration = 0
+    while True:
         try:
-            await run_reminder_with_retry()
-            logger.info("initial reminder check completed successfully")
-        except Exception as e:
-            logger.exception(f"initial reminder check failed: {e}")
+            iteration += 1
+            logger.info(f"starting reminder iteration #{iteration}")
 
-        iteration = 0
-        while True:
-            try:
-                iteration += 1
-                logger.info(f"starting reminder iteration #{iteration}")
+            # calculate sleep time until next 8 AM
+            sleep_seconds, next_8am = calculate_seconds_until_next_8am()
+            logger.info(
+                f"sleeping {sleep_seconds / 3600:.1f} hours until next reminder: {next_8am}"
+            )
+            await asyncio.sleep(sleep_seconds)
+
+            logger.info(f"woke up at 8 AM, starting reminder iteration #{iteration}")
 
-                # calculate sleep time until next 8 AM
-                sleep_seconds, next_8am = calculate_seconds_until_next_8am()
-                logger.info(
-                    f"sleeping {sleep_seconds / 3600:.1f} hours until next reminder: {next_8am}"
-                )
-                await asyncio.sleep(sleep_seconds)
+            # execute daily reminders with retry
+            success = await run_reminder_with_retry()
 
-                logger.info(f"woke up at 8 AM, starting reminder iteration #{iteration}")
+            if not success:
+                logger.error("failed to send reminders after all retries")
+            else:
+                logger.info("reminder check completed successfully")
 
-                # execute daily reminders with retry
-                logger.info("calling run_reminder_with_retry()...")
-                success = await run_reminder_with_retry()
+            # no post-run buffer needed: once past 8 AM the next computed
+            # target is already tomorrow
+
+        except asyncio.CancelledError:
+            logger.info("reminder worker cancelled")
+            break
+        except Exception as e:
+            logger.exception(f"unexpected error in reminder worker iteration #{iteration}: {e}")
+            # sleep straight through to the next deadline instead of a fixed
+            # hourly poll; floor of 60s guards against a tight error loop
+            backoff, _ = calculate_seconds_until_next_8am()
+            await asyncio.sleep(max(60, backoff))
+
+
+async def _start_reminder_loop(application):
+    """post_init hook: schedule the reminder loop alongside the handlers"""
+    # share the application's bot so the scheduler reuses its initialized
+    # HTTPX client and keep-alive pool instead of opening a second one
+    reminder_scheduler.attach_bot(application.bot)
+    application.create_task(_reminder_loop(application))
+    logger.info("embedded reminder worker scheduled on the bot event loop")
+
+
+# static reply texts rendered once at import instead of per message
+WELCOME_TEXT = (
+    "Welcome to Peptide Scheduler Bot! 🧬\n\n"
+    "Send me your peptide schedule and I'll remind you when to take them.\n"
+    "Use /help for more information."
+)
 
-                if not success:
-                    logger.error("failed to send reminders after all retries")
-                else:
-                    logger.info("reminder check completed successfully")
+HELP_TEXT = (
+    "📋 <b>Commands:</b>\n"
+    "/start - Start the bot\n"
+    "/help - Show this help\n"
+    "/status - Check your current schedule\n"
+    "/clear - Stop schedules with buttons\n\n"
+    "💊 <b>Schedule format:</b>\n"
+    "<code>name; dose; days; weeks</code>\n\n"
+    "📅 <b>Days patterns:</b>\n"
+    "• 1-7 = every day\n"
+    "• 1-5 = weekdays\n"
+    "• 1,3,5 = Mon/Wed/Fri\n\n"
+    "📝 <b>Examples:</b>\n"
+    "<code>GHK-Cu; 1mg; 1-7; 6</code>\n"
+    "<code>BPC-157; 500mcg; 1,3,5; 8</code>"
+)
 
-                logger.info(f"completed reminder iteration #{iteration}, continuing loop...")
+PARSE_ERROR_TEXT = (
+    "❌ I couldn't understand that format.\n\n"
+    "📝 Use: <code>name; dose; days; weeks</code>\n\n"
+    "Examples:\n"
+    "<code>GHK-Cu; 1mg; 1-7; 6</code>\n"
+    "<code>BPC-157; 500mcg; 1,3,5; 8</code>"
+)
 
-                # small buffer to avoid immediate re-execution
-                await asyncio.sleep(60)
 
-            except asyncio.CancelledError:
-                logger.info("reminder worker cancelled")
-                break
-            except Exception as e:
-                logger.exception(f"unexpected error in reminder worker iteration #{iteration}: {e}")
-                logger.info("continuing after error...")
-                await asyncio.sleep(3600)
+# cache telegram_id -> (db user id, username) so repeat messages skip the
+# per-message SELECT; refreshed when the username changes
+_USER_CACHE_MAX = 10000
+_user_cache: dict[int, tuple[int, str | None]] = {}
 
-        logger.error("reminder worker exited main loop - this should not happen!")
 
-    try:
-        loop.run_until_complete(async_worker())
-    finally:
-        loop.close()
+def _ensure_user_id(effective_user) -> int:
+    """get the DB id for a telegram user, hitting the DB only on cache miss"""
+    cached = _user_cache.get(effective_user.id)
+    if cached and cached[1] == effective_user.username:
+        return cached[0]
+
+    user = get_or_create_user(
+        telegram_id=effective_user.id,
+        username=effective_user.username,
+        first_name=effective_user.first_name,
+        last_name=effective_user.last_name,
+    )
+    if len(_user_cache) >= _USER_CACHE_MAX:
+        _user_cache.clear()
+    _user_cache[effective_user.id] = (user.id, effective_user.username)
+    return user.id
 
 
 async def start(update, context):
     """handle /start command"""
     # create user in database (result not needed, just ensuring user exists)
-    get_or_create_user(
-        telegram_id=update.effective_user.id,
-        username=update.effective_user.username,
-        first_name=update.effective_user.first_name,
-        last_name=update.effective_user.last_name,
-    )
+    _ensure_user_id(update.effective_user)
 
-    await update.message.reply_text(
-        "Welcome to Peptide Scheduler Bot! 🧬\n\n"
-        "Send me your peptide schedule and I'll remind you when to take them.\n"
-        "Use /help for more information."
-    )
+    await update.message.reply_text(WELCOME_TEXT)
 
 
 async def help_command(update, context):
     """handle /help command"""
-    await update.message.reply_text(
-        "📋 <b>Commands:</b>\n"
-        "/start - Start the bot\n"
-        "/help - Show this help\n"
-        "/status - Check your current schedule\n"
-        "/clear - Stop schedules with buttons\n\n"
-        "💊 <b>Schedule format:</b>\n"
-        "<code>name; dose; days; weeks</code>\n\n"
-        "📅 <b>Days patterns:</b>\n"
-        "• 1-7 = every day\n"
-        "• 1-5 = weekdays\n"
-        "• 1,3,5 = Mon/Wed/Fri\n\n"
-        "📝 <b>Examples:</b>\n"
-        "<code>GHK-Cu; 1mg; 1-7; 6</code>\n"
-        "<code>BPC-157; 500mcg; 1,3,5; 8</code>",
-        parse_mode="HTML",
-    )
+    await update.message.reply_text(HELP_TEXT, parse_mode="HTML")
 
 
 async def status_command(update, context):
@@ -187,14 +215,17 @@ async def status_command(update, context):
         await update.message.reply_text("You have no active schedules.")
         return
 
-    today = datetime.utcnow().date()
-    response = "📊 Your active schedules:\n\n"
+    # one clock read per request; ordinal ints make the per-row date math a
+    # single subtraction instead of repeated date() conversions
+    today_ord = datetime.utcnow().toordinal()
+    parts = ["📊 Your active schedules:\n\n"]
 
     for schedule in schedules:
-        days_since_start = (today - schedule.start_date.date()).days
+        start_ord = schedule.start_date.toordinal()
+        days_since_start = today_ord - start_ord
         days_remaining = schedule.cycle_duration_days - days_since_start
-        rest_end_date = schedule.start_date.date() + timedelta(
-            days=schedule.cycle_duration_days + schedule.rest_period_days
+        rest_end_date = date.fromordinal(
+            start_ord + schedule.cycle_duration_days + schedule.rest_period_days
         )
         schedule_days = (
             days_to_readable(schedule.days_of_week)
@@ -202,14 +233,16 @@ async def status_command(update, context):
             else schedule.frequency or "daily"
         )
 
-        response += f"💊 <b>{schedule.peptide_name}</b>\n"
-        response += f"   📏 Dosage: {schedule.dosage}\n"
-        response += f"   ⏰ Schedule: {schedule_days}\n"
-        response += f"   📅 Days remaining: {max(0, days_remaining)}\n"
-        response += f"   😴 Rest period: {schedule.rest_period_days} days\n"
-        response += f"   🔄 Can restart: {rest_end_date.strftime('%b %d, %Y')}\n\n"
+        parts.append(
+            f"💊 <b>{schedule.peptide_name}</b>\n"
+            f"   📏 Dosage: {schedule.dosage}\n"
+            f"   ⏰ Schedule: {schedule_days}\n"
+            f"   📅 Days remaining: {max(0, days_remaining)}\n"
+            f"   😴 Rest period: {schedule.rest_period_days} days\n"
+            f"   🔄 Can restart: {rest_end_date.strftime('%b %d, %Y')}\n\n"
+        )
 
-    await update.message.reply_text(response, parse_mode="HTML")
+    await update.message.reply_text("".join(parts), parse_mode="HTML")
 
 
 async def stop_command(update, context):
@@ -222,83 +255,70 @@ async def stop_command(update, context):
 
     peptide_name = " ".join(context.args)
 
-    db = SessionLocal()
-    try:
-        # find user
-        user = db.query(User).filter(User.telegram_id == update.effective_user.id).first()
-        if not user:
-            await update.message.reply_text("❌ User not found.")
-            return
-
-        # find matching active schedule
+    # no awaits while the session is open: do the DB work, commit, then reply
+    with session_scope() as db:
+        # user lookup and schedule match folded into one JOIN round trip
         schedule = (
             db.query(Schedule)
+            .join(User, User.id == Schedule.user_id)
             .filter(
-                Schedule.user_id == user.id,
+                User.telegram_id == update.effective_user.id,
                 Schedule.peptide_name.ilike(f"%{peptide_name}%"),
                 Schedule.is_active == True,
             )
             .first()
         )
 
-        if not schedule:
-            await update.message.reply_text(
-                f"❌ No active schedule found for '{peptide_name}'.\n"
-                "Use /status to see your active schedules."
-            )
-            return
-
-        # deactivate schedule
-        schedule.is_active = False
-        schedule.completed_at = datetime.utcnow()
-        db.commit()
+        if schedule:
+            # deactivate schedule
+            schedule.is_active = False
+            schedule.completed_at = datetime.utcnow()
 
+    if not schedule:
         await update.message.reply_text(
-            f"✅ Stopped schedule for <b>{schedule.peptide_name}</b>\n"
-            f"You will no longer receive reminders for this peptide.",
-            parse_mode="HTML",
+            f"❌ No active schedule found for '{peptide_name}'.\n"
+            "Use /status to see your active schedules."
         )
-        logger.info(f"user {user.telegram_id} stopped schedule {schedule.id}")
+        return
 
-    finally:
-        db.close()
+    # committed; schedule stays readable thanks to expire_on_commit=False
+    invalidate_schedule_cache(update.effective_user.id)
+    await update.message.reply_text(
+        f"✅ Stopped schedule for <b>{schedule.peptide_name}</b>\n"
+        f"You will no longer receive reminders for this peptide.",
+        parse_mode="HTML",
+    )
+    logger.info(f"user {update.effective_user.id} stopped schedule {schedule.id}")
 
 
 async def stopall_command(update, context):
     """handle /stopall command - deactivate all schedules"""
-    db = SessionLocal()
-    try:
+    telegram_id = update.effective_user.id
+    count = 0
+    with session_scope() as db:
         # find user
-        user = db.query(User).filter(User.telegram_id == update.effective_user.id).first()
-        if not user:
-            await update.message.reply_text("❌ User not found.")
-            return
-
-        # find all active schedules
-        active_schedules = (
-            db.query(Schedule).filter(Schedule.user_id == user.id, Schedule.is_active == True).all()
-        )
-
-        if not active_schedules:
-            await update.message.reply_text("You have no active schedules to stop.")
-            return
-
-        # deactivate all schedules
-        count = 0
-        for schedule in active_schedules:
-            schedule.is_active = False
-            schedule.completed_at = datetime.utcnow()
-            count += 1
-
-        db.commit()
+        user_id = db.query(User.id).filter(User.telegram_id == telegram_id).scalar()
+        if user_id is not None:
+            # deactivate everything in one UPDATE instead of loading each row
+            count = db.execute(
+                sql_update(Schedule)
+                .where(Schedule.user_id == user_id, Schedule.is_active == True)
+                .values(is_active=False, completed_at=datetime.utcnow())
+            ).rowcount
+
+    if user_id is None:
+        await update.message.reply_text("❌ User not found.")
+        return
 
-        await update.message.reply_text(
-            f"✅ Stopped all {count} active schedule(s).\nYou will no longer receive reminders."
-        )
-        logger.info(f"user {user.telegram_id} stopped all {count} schedules")
+    if not count:
+        await update.message.reply_text("You have no active schedules to stop.")
+        return
 
-    finally:
-        db.close()
+    invalidate_schedule_cache(telegram_id)
+    await update.message.reply_text(
+        f"✅ Stopped all {count} active schedule(s).\nYou will no longer receive reminders."
+    )
+    logger.info(f"user {telegram_id} stopped all {count} schedules")
 
 
 async def clear_command(update, context):
@@ -309,11 +329,11 @@ async def clear_command(update, context):
         await update.message.reply_text("You have no active schedules to clear.")
         return
 
-    today = datetime.utcnow().date()
+    today_ord = datetime.utcnow().toordinal()
     keyboard = []
 
     for schedule in schedules:
-        days_remaining = schedule.cycle_duration_days - (today - schedule.start_date.date()).days
+        days_remaining = schedule.cycle_duration_days - today_ord + schedule.start_date.toordinal()
         button_text = f"❌ {schedule.peptide_name} ({max(0, days_remaining)}d left)"
         keyboard.append([InlineKeyboardButton(button_text, callback_data=f"clear:{schedule.id}")])
 
@@ -333,33 +353,36 @@ async def handle_clear_callback(update, context):
 
     schedule_id = int(query.data.split(":")[1])
 
-    db = SessionLocal()
-    try:
-        schedule = db.query(Schedule).filter(Schedule.id == schedule_id).first()
-
-        if not schedule:
-            await query.edit_message_text("❌ Schedule not found.")
-            return
-
-        # verify ownership
-        user = db.query(User).filter(User.telegram_id == update.effective_user.id).first()
-        if not user or schedule.user_id != user.id:
-            await query.edit_message_text("❌ Unauthorized.")
-            return
-
-        peptide_name = schedule.peptide_name
-        schedule.is_active = False
-        schedule.completed_at = datetime.utcnow()
-        db.commit()
-
-        await query.edit_message_text(
-            f"✅ Stopped <b>{peptide_name}</b>\nUse /clear to manage remaining schedules.",
-            parse_mode="HTML",
+    with session_scope() as db:
+        # ownership enforced in the JOIN itself: a foreign schedule id simply
+        # doesn't match, so there's no separate user lookup or Python compare
+        schedule = (
+            db.query(Schedule)
+            .join(User, User.id == Schedule.user_id)
+            .filter(Schedule.id == schedule_id, User.telegram_id == update.effective_user.id)
+            .first()
         )
-        logger.info(f"user {user.telegram_id} cleared schedule {schedule_id} via button")
 
-    finally:
-        db.close()
+        if schedule:
+            peptide_name = schedule.peptide_name
+            schedule.is_active = False
+            schedule.completed_at = datetime.utcnow()
+
+    if not schedule:
+        await query.edit_message_text("❌ Schedule not found.")
+        return
+
+    invalidate_schedule_cache(update.effective_user.id)
+    await query.edit_message_text(
+        f"✅ Stopped <b>{peptide_name}</b>\nUse /clear to manage remaining schedules.",
+        parse_mode="HTML",
+    )
+    logger.info(f"user {update.effective_user.id} cleared schedule {schedule_id} via button")
+
+
+# dosage-unit substrings that any parseable schedule must contain; checked
+# before running the full parse pipeline on ordinary chat messages
+_UNIT_HINTS = ("mg", "mcg", "iu", "ml", "cc", "ug", "μg")
 
 
 async def handle_message(update, context):
@@ -367,21 +390,23 @@ async def handle_message(update, context):
     message_text = update.message.text
     logger.info(f"received message: {message_text}")
 
-    # try to parse as schedule
-    parsed = parse_schedule(message_text)
+    # cheap pre-filter: a schedule needs semicolons and a dosage unit, so
+    # skip the parser entirely for plain chat
+    parsed = None
+    if ";" in message_text:
+        low = message_text.lower()
+        if any(hint in low for hint in _UNIT_HINTS):
+            parsed = parse_schedule(message_text)
 
     if parsed:
-        # get or create user
-        user = get_or_create_user(
-            telegram_id=update.effective_user.id,
-            username=update.effective_user.username,
-            first_name=update.effective_user.first_name,
-            last_name=update.effective_user.last_name,
-        )
+        # DB work runs in worker threads so the handler never blocks the
+        # event loop on SQL; user lookup is cached after the first message
+        user_id = await asyncio.to_thread(_ensure_user_id, update.effective_user)
 
         # create schedule (result not needed here, just creating)
-        create_schedule(
-            user_id=user.id,
+        await asyncio.to_thread(
+            create_schedule,
+            user_id=user_id,
             peptide_name=parsed.peptide_name,
             dosage=parsed.dosage,
             days_of_week=parsed.days_of_week,
@@ -401,14 +426,7 @@ async def handle_message(update, context):
             f"🌅 I'll remind you at 8:00 AM on scheduled days!"
         )
     else:
-        await update.message.reply_text(
-            "❌ I couldn't understand that format.\n\n"
-            "📝 Use: <code>name; dose; days; weeks</code>\n\n"
-            "Examples:\n"
-            "<code>GHK-Cu; 1mg; 1-7; 6</code>\n"
-            "<code>BPC-157; 500mcg; 1,3,5; 8</code>",
-            parse_mode="HTML",
-        )
+        await update.message.reply_text(PARSE_ERROR_TEXT, parse_mode="HTML")
 
 
 def main():
@@ -418,13 +436,30 @@ def main():
     # initialize database
     init_database()
 
-    # start reminder scheduler in background thread
-    reminder_thread = threading.Thread(target=reminder_worker, daemon=True)
-    reminder_thread.start()
-    logger.info("embedded reminder worker started in background thread")
-
-    # create application
-    application = Application.builder().token(get_bot_token()).build()
+    # read the token once; it's reused for the webhook path below
+    token = get_bot_token()
+
+    # create application; the reminder loop is scheduled on its event loop
+    # via post_init so the bot and scheduler share one loop and HTTP client,
+    # and the rate limiter keeps broadcasts under Telegram's message cap.
+    # the request pool is sized for the morning reminder fan-out so sends
+    # reuse keep-alive connections instead of handshaking per message
+    application = (
+        Application.builder()
+        .token(token)
+        .request(
+            HTTPXRequest(
+                connection_pool_size=64,
+                read_timeout=20,
+                write_timeout=20,
+                connect_timeout=5,
+                pool_timeout=30,
+            )
+        )
+        .rate_limiter(AIORateLimiter(overall_max_rate=25, overall_time_period=1))
+        .post_init(_start_reminder_loop)
+        .build()
+    )
 
     # add handlers
     application.add_handler(CommandHandler("start", start))
@@ -440,20 +475,29 @@ def main():
     webhook_url = os.getenv("WEBHOOK_URL")
     port = int(os.getenv("PORT", 8443))
 
-    if webhook_url:
-        # production mode with webhooks
-        logger.info(f"starting bot with webhook: {webhook_url}")
-        bot_token = get_bot_token()
-        application.run_webhook(
-            listen="0.0.0.0",
-            port=port,
-            url_path=bot_token,
-            webhook_url=f"{webhook_url}/{bot_token}",
-        )
-    else:
-        # development mode with polling
-        logger.info("bot is running in polling mode...")
-        application.run_polling()
+    try:
+        if webhook_url:
+            # production mode with webhooks
+            logger.info(f"starting bot with webhook: {webhook_url}")
+            application.run_webhook(
+                listen="0.0.0.0",
+                port=port,
+                url_path=token,
+                webhook_url=f"{webhook_url}/{token}",
+                allowed_updates=["message", "callback_query"],
+                drop_pending_updates=True,
+            )
+        else:
+            # development mode with polling; only request the update types we
+            # handle and skip any backlog accumulated while offline
+            logger.info("bot is running in polling mode...")
+            application.run_polling(
+                allowed_updates=["message", "callback_query"],
+                drop_pending_updates=True,
+            )
+    finally:
+        # return pooled connections cleanly on shutdown
+        engine.dispose()
 
 
 if __name__ == "__main__":
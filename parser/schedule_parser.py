@@ -3,6 +3,7 @@ from __future__ import annotations
 import logging
 import re
 from dataclasses import dataclass
+from functools import lru_cache
 
 logger = logging.getLogger(__name__)
 
@@ -12,8 +13,29 @@ MAX_DOSAGE_LENGTH = 50
 MAX_WEEKS = 52
 MIN_WEEKS = 1
 
-
-@dataclass
+# patterns compiled once at import so the per-message parse path skips the
+# re-module cache lookup entirely
+_NAME_RE = re.compile(r"^[a-zA-Z0-9\-\s]+$")
+_DOSAGE_RE = re.compile(r"^[\d\.\s]+(mg|mcg|iu|ml|cc)$")
+_RANGE_RE = re.compile(r"^(\d)-(\d)$")
+_DAYLIST_RE = re.compile(r"^[\d,]+$")
+
+# peptide-specific rest periods; first keyword found in the name wins,
+# otherwise rest equals the cycle length
+_REST_RULES = (("foxo4", 120), ("epithalon", 180), ("tb-500", 60))
+
+# whole-message grammar for "name; dosage; days; weeks" — one pass instead of
+# split + per-field validation regexes; days still go through parse_days_pattern
+_SCHEDULE_RE = re.compile(
+    r"^(?P<name>[a-zA-Z0-9\-\s]+?)\s*"
+    r";\s*(?P<dose>[\d\.\s]*[\d\.])\s*(?P<unit>mg|mcg|iu|ml|cc|μg|ug)\s*"
+    r";\s*(?P<days>[\d,\-\s]+?)\s*"
+    r";\s*(?P<weeks>\d+)\s*$",
+    re.IGNORECASE,
+)
+
+
+@dataclass(frozen=True, slots=True)
 class ParsedSchedule:
     """structured peptide schedule data"""
 
@@ -25,10 +47,14 @@ class ParsedSchedule:
     notes: str = ""
 
 
+# deletion table for dangerous characters; semicolons stay for parsing
+_STRIP_TABLE = str.maketrans("", "", "<>\"'\\")
+
+
 def sanitize_input(text: str) -> str:
     """sanitize user input to prevent injection attacks"""
-    # remove dangerous characters but keep semicolons for parsing
-    text = re.sub(r"[<>\"\'\\]", "", text)
+    # remove dangerous characters in one C-level pass
+    text = text.translate(_STRIP_TABLE)
     # normalize whitespace
     text = " ".join(text.split())
     return text.strip()
@@ -36,18 +62,19 @@ def sanitize_input(text: str) -> str:
 
 def validate_peptide_name(name: str) -> bool:
     """validate peptide name format"""
-    if not re.match(r"^[a-zA-Z0-9\-\s]+$", name):
+    if not _NAME_RE.match(name):
         return False
     return len(name) <= MAX_PEPTIDE_NAME_LENGTH
 
 
 def validate_dosage(dosage: str) -> bool:
     """validate dosage format"""
-    if not re.match(r"^[\d\.\s]+(mg|mcg|iu|ml|cc)$", dosage.lower()):
+    if not _DOSAGE_RE.match(dosage.lower()):
         return False
     return len(dosage) <= MAX_DOSAGE_LENGTH
 
 
+@lru_cache(maxsize=512)
 def parse_days_pattern(pattern: str) -> str | None:
     """
     Parse days pattern and return normalized "1,2,3" format.
@@ -62,7 +89,7 @@ def parse_days_pattern(pattern: str) -> str | None:
     pattern = pattern.strip()
 
     # check for range format: "1-7" or "1-5"
-    range_match = re.match(r"^(\d)-(\d)$", pattern)
+    range_match = _RANGE_RE.match(pattern)
     if range_match:
         start, end = int(range_match.group(1)), int(range_match.group(2))
         if 1 <= start <= 7 and 1 <= end <= 7 and start <= end:
@@ -70,7 +97,7 @@ def parse_days_pattern(pattern: str) -> str | None:
         return None
 
     # check for list format: "1,3,5"
-    if re.match(r"^[\d,]+$", pattern):
+    if _DAYLIST_RE.match(pattern):
         days = [d.strip() for d in pattern.split(",") if d.strip()]
         valid_days = []
         for d in days:
@@ -84,25 +111,30 @@ def parse_days_pattern(pattern: str) -> str | None:
     return None
 
 
+# canonical patterns resolve in one hash lookup; anything else falls back to
+# joining per-day names
+_READABLE_PATTERNS = {"1,2,3,4,5,6,7": "daily", "1,2,3,4,5": "weekdays", "6,7": "weekends"}
+_DAY_NAMES = {"1": "Mon", "2": "Tue", "3": "Wed", "4": "Thu", "5": "Fri", "6": "Sat", "7": "Sun"}
+
+
+@lru_cache(maxsize=512)
 def days_to_readable(days_of_week: str) -> str:
     """convert days_of_week to human readable format"""
-    day_names = {"1": "Mon", "2": "Tue", "3": "Wed", "4": "Thu", "5": "Fri", "6": "Sat", "7": "Sun"}
-    days = days_of_week.split(",")
-
-    if days == ["1", "2", "3", "4", "5", "6", "7"]:
-        return "daily"
-    elif days == ["1", "2", "3", "4", "5"]:
-        return "weekdays"
-    elif days == ["6", "7"]:
-        return "weekends"
-    else:
-        return "/".join(day_names.get(d, d) for d in days)
+    readable = _READABLE_PATTERNS.get(days_of_week)
+    if readable:
+        return readable
+    return "/".join(_DAY_NAMES.get(d, d) for d in days_of_week.split(","))
 
 
+@lru_cache(maxsize=1024)
 def parse_schedule(text: str) -> ParsedSchedule | None:
     """
     Parse semicolon-separated peptide schedule.
 
+    Pure function of its input, so results for repeated messages (users
+    re-sending or tweaking copy-pasted schedules) come from the LRU cache;
+    ParsedSchedule is frozen so cached instances are safe to share.
+
     Format: peptide name; dosage; days; weeks
     Examples:
     - "GHK-Cu; 1mg; 1-7; 6" → daily for 6 weeks
@@ -111,53 +143,47 @@ def parse_schedule(text: str) -> ParsedSchedule | None:
     if not text or len(text) > 200:
         return None
 
+    # cheap guards: any valid schedule has semicolons and digits, so plain
+    # chat bails out before sanitizing or touching the regex
+    if ";" not in text or not any(c.isdigit() for c in text):
+        return None
+
     text = sanitize_input(text)
-    parts = [p.strip() for p in text.split(";")]
 
-    if len(parts) != 4:
-        logger.warning(f"expected 4 parts, got {len(parts)}")
+    # single combined scan of the whole message instead of split + one regex
+    # per field
+    match = _SCHEDULE_RE.match(text)
+    if not match:
+        logger.warning(f"message does not match schedule format: {text}")
         return None
 
-    peptide_name, dosage, days_pattern, weeks_str = parts
-
-    # validate peptide name
-    if not peptide_name or not validate_peptide_name(peptide_name):
+    peptide_name = match.group("name")
+    if len(peptide_name) > MAX_PEPTIDE_NAME_LENGTH:
         logger.warning(f"invalid peptide name: {peptide_name}")
         return None
 
-    # validate and normalize dosage
-    dosage = dosage.lower().replace(" ", "")
-    # handle unicode μ
-    dosage = dosage.replace("μg", "mcg").replace("ug", "mcg")
-    if not validate_dosage(dosage):
+    # normalize dosage: strip spaces, lowercase unit, map unicode μ
+    unit = match.group("unit").lower().replace("μg", "mcg").replace("ug", "mcg")
+    dosage = match.group("dose").replace(" ", "") + unit
+    if len(dosage) > MAX_DOSAGE_LENGTH:
         logger.warning(f"invalid dosage: {dosage}")
         return None
 
     # parse days pattern
+    days_pattern = match.group("days")
     days_of_week = parse_days_pattern(days_pattern)
     if not days_of_week:
         logger.warning(f"invalid days pattern: {days_pattern}")
         return None
 
-    # parse weeks
-    try:
-        weeks = int(weeks_str)
-        if weeks < MIN_WEEKS or weeks > MAX_WEEKS:
-            logger.warning(f"weeks out of range: {weeks}")
-            return None
-    except ValueError:
-        logger.warning(f"invalid weeks value: {weeks_str}")
+    weeks = int(match.group("weeks"))
+    if weeks < MIN_WEEKS or weeks > MAX_WEEKS:
+        logger.warning(f"weeks out of range: {weeks}")
         return None
 
     # calculate rest period based on peptide
-    rest_period_days = weeks * 7  # default: equal rest to cycle
     peptide_lower = peptide_name.lower()
-    if "foxo4" in peptide_lower:
-        rest_period_days = 120
-    elif "epithalon" in peptide_lower:
-        rest_period_days = 180
-    elif "tb-500" in peptide_lower:
-        rest_period_days = 60
+    rest_period_days = next((d for k, d in _REST_RULES if k in peptide_lower), weeks * 7)
 
     return ParsedSchedule(
         peptide_name=peptide_name,
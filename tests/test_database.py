@@ -1,34 +1,48 @@
-import os
-import tempfile
 from datetime import datetime
 
 import pytest
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
 
 from database.models import Base, Schedule, User, WorkerState
 
 
-class TestDatabase:
-    """test database operations"""
+@pytest.fixture(scope="session")
+def _engine():
+    """one in-memory database and schema for the whole test session"""
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def test_db(_engine):
+    """per-test session against the shared schema; teardown wipes all rows
 
-    @pytest.fixture
-    def test_db(self):
-        """create a temporary test database"""
-        # create temporary database file
-        db_fd, db_path = tempfile.mkstemp()
-        engine = create_engine(f"sqlite:///{db_path}")
-        Base.metadata.create_all(engine)
+    (pysqlite doesn't support the savepoint-rollback isolation pattern
+    without extra BEGIN plumbing, so plain row deletion keeps tests
+    isolated at a fraction of a schema rebuild's cost)
+    """
+    session = Session(bind=_engine)
 
-        Session = sessionmaker(bind=engine)
-        session = Session()
+    yield session
 
-        yield session
+    session.rollback()
+    for table in reversed(Base.metadata.sorted_tables):
+        session.execute(table.delete())
+    session.commit()
+    session.close()
 
-        # cleanup
-        session.close()
-        os.close(db_fd)
-        os.unlink(db_path)
+
+class TestDatabase:
+    """test database operations"""
 
     def test_user_creation(self, test_db):
         """test user creation and uniqueness"""
@@ -45,52 +59,52 @@ class TestDatabase:
         # test unique constraint
         duplicate_user = User(telegram_id=123456789, username="another")
         test_db.add(duplicate_user)
-        with pytest.raises(Exception):  # should raise integrity error
+        with pytest.raises(IntegrityError):
             test_db.commit()
 
     def test_schedule_creation(self, test_db):
         """test schedule creation with validation"""
-        # create user first
-        user = User(telegram_id=123456789)
-        test_db.add(user)
-        test_db.commit()
-
-        # create schedule
-        schedule = Schedule(
-            user_id=user.id,
-            peptide_name="GHK-Cu",
-            dosage="1mg",
-            frequency="daily",
-            cycle_duration_days=42,
-            rest_period_days=14,
-            start_date=datetime.utcnow(),
+        # build the graph through the relationship so one add + commit seeds
+        # both rows and the FK resolves at flush
+        user = User(
+            telegram_id=123456789,
+            schedules=[
+                Schedule(
+                    peptide_name="GHK-Cu",
+                    dosage="1mg",
+                    frequency="daily",
+                    cycle_duration_days=42,
+                    rest_period_days=14,
+                    start_date=datetime.utcnow(),
+                )
+            ],
         )
-        test_db.add(schedule)
+        test_db.add(user)
         test_db.commit()
 
         # verify schedule
         found_schedule = test_db.query(Schedule).filter_by(user_id=user.id).first()
         assert found_schedule is not None
         assert found_schedule.peptide_name == "GHK-Cu"
-        assert found_schedule.is_active == True
+        assert found_schedule.is_active
 
     def test_cascade_deletion(self, test_db):
         """test that deleting user deletes related schedules"""
-        # create user with schedule
-        user = User(telegram_id=123456789)
-        test_db.add(user)
-        test_db.commit()
-
-        schedule = Schedule(
-            user_id=user.id,
-            peptide_name="Test",
-            dosage="1mg",
-            frequency="daily",
-            cycle_duration_days=30,
-            rest_period_days=7,
-            start_date=datetime.utcnow(),
+        # create user with schedule in one add + commit via the relationship
+        user = User(
+            telegram_id=123456789,
+            schedules=[
+                Schedule(
+                    peptide_name="Test",
+                    dosage="1mg",
+                    frequency="daily",
+                    cycle_duration_days=30,
+                    rest_period_days=7,
+                    start_date=datetime.utcnow(),
+                )
+            ],
         )
-        test_db.add(schedule)
+        test_db.add(user)
         test_db.commit()
 
         # delete user
@@ -116,21 +130,22 @@ class TestDatabase:
         # test unique constraint
         duplicate_state = WorkerState(worker_name="reminder_scheduler")
         test_db.add(duplicate_state)
-        with pytest.raises(Exception):
+        with pytest.raises(IntegrityError):
             test_db.commit()
 
 
 class TestDataIntegrity:
     """test data integrity and constraints"""
 
-    def test_required_fields(self):
+    def test_required_fields(self, test_db):
         """test that required fields are enforced"""
-        # user without telegram_id should fail
-        with pytest.raises(Exception):
-            _user = User(username="test")
-            # telegram_id is required
-
-        # schedule without required fields should fail
-        with pytest.raises(Exception):
-            _schedule = Schedule(peptide_name="Test")
-            # missing user_id, dosage, frequency, etc.
+        # user without telegram_id should fail at flush (NOT NULL)
+        test_db.add(User(username="test"))
+        with pytest.raises(IntegrityError):
+            test_db.flush()
+        test_db.rollback()
+
+        # schedule without required fields should fail at flush
+        test_db.add(Schedule(peptide_name="Test"))
+        with pytest.raises(IntegrityError):
+            test_db.flush()
@@ -1,3 +1,5 @@
+import pytest
+
 from parser.schedule_parser import (
     days_to_readable,
     parse_days_pattern,
@@ -11,27 +13,29 @@ from parser.schedule_parser import (
 class TestScheduleParser:
     """test schedule parsing functionality"""
 
-    def test_valid_schedules(self):
-        """test parsing of valid schedule formats"""
-        test_cases = [
-            # (input, peptide, dosage, days_of_week, weeks)
+    @pytest.mark.parametrize(
+        "text,expected_peptide,expected_dosage,expected_days,expected_weeks",
+        [
             ("GHK-Cu; 1mg; 1-7; 6", "GHK-Cu", "1mg", "1,2,3,4,5,6,7", 6),
             ("BPC-157; 500mcg; 1,3,5; 8", "BPC-157", "500mcg", "1,3,5", 8),
             ("TB-500; 2mg; 1; 4", "TB-500", "2mg", "1", 4),
             ("Ipamorelin; 200mcg; 1-5; 12", "Ipamorelin", "200mcg", "1,2,3,4,5", 12),
-        ]
-
-        for text, expected_peptide, expected_dosage, expected_days, expected_weeks in test_cases:
-            result = parse_schedule(text)
-            assert result is not None, f"Failed to parse: {text}"
-            assert result.peptide_name == expected_peptide
-            assert result.dosage == expected_dosage
-            assert result.days_of_week == expected_days
-            assert result.weeks == expected_weeks
-
-    def test_invalid_schedules(self):
-        """test rejection of invalid schedules"""
-        invalid_cases = [
+        ],
+    )
+    def test_valid_schedules(
+        self, text, expected_peptide, expected_dosage, expected_days, expected_weeks
+    ):
+        """test parsing of valid schedule formats"""
+        result = parse_schedule(text)
+        assert result is not None, f"Failed to parse: {text}"
+        assert result.peptide_name == expected_peptide
+        assert result.dosage == expected_dosage
+        assert result.days_of_week == expected_days
+        assert result.weeks == expected_weeks
+
+    @pytest.mark.parametrize(
+        "text",
+        [
             "",  # empty
             "just some random text",  # no structure
             "GHK-Cu; 1mg; 1-7",  # missing weeks
@@ -41,26 +45,28 @@ class TestScheduleParser:
             "GHK-Cu; 1mg; 8-9; 6",  # invalid day range
             "GHK-Cu; 1mg; 1-7; 0",  # zero weeks
             "GHK-Cu; 1mg; 1-7; 53",  # too many weeks
-        ]
-
-        for text in invalid_cases:
-            result = parse_schedule(text)
-            assert result is None, f"Should not parse: {text}"
+        ],
+    )
+    def test_invalid_schedules(self, text):
+        """test rejection of invalid schedules"""
+        result = parse_schedule(text)
+        assert result is None, f"Should not parse: {text}"
 
-    def test_security_injection_attempts(self):
-        """test SQL injection and XSS prevention"""
-        malicious_inputs = [
+    @pytest.mark.parametrize(
+        "text",
+        [
             "GHK-Cu'; DROP TABLE users; --; 1mg; 1-7; 6",
             "<script>alert('xss')</script>; 1mg; 1-7; 6",
-        ]
-
-        for text in malicious_inputs:
-            result = parse_schedule(text)
-            if result:
-                assert "<" not in result.peptide_name
-                assert ">" not in result.peptide_name
-                assert '"' not in result.peptide_name
-                assert "\\" not in result.peptide_name
+        ],
+    )
+    def test_security_injection_attempts(self, text):
+        """test SQL injection and XSS prevention"""
+        result = parse_schedule(text)
+        if result:
+            assert "<" not in result.peptide_name
+            assert ">" not in result.peptide_name
+            assert '"' not in result.peptide_name
+            assert "\\" not in result.peptide_name
 
 
 class TestDaysPattern: